@@ -7,10 +7,89 @@ Weirdhost 续期和启动脚本 - GitHub Actions 版本
 """
 
 import os
+import re
 import sys
+import json
 import time
+import asyncio
+from types import MappingProxyType
 from datetime import datetime, timezone, timedelta
-from playwright.sync_api import sync_playwright, TimeoutError, expect
+from urllib.parse import unquote, urlparse
+from playwright.async_api import async_playwright, TimeoutError, expect
+
+# 拦截与续期/启动无关的资源（图片、字体、媒体和第三方追踪），减少每次页面加载的流量
+# 直接按URL匹配注册路由，其余请求不经过路由处理，避免每个请求都往返一次
+BLOCKED_URL_PATTERN = re.compile(
+    r'\.(?:png|jpe?g|gif|webp|avif|svg|ico|bmp|woff2?|ttf|otf|eot|mp3|mp4|webm|ogg|wav)(?:[?#]|$)'
+    r'|google-analytics|googletagmanager|doubleclick|sentry',
+    re.IGNORECASE
+)
+
+# CF挑战页面元素、续期按钮和启动按钮，合并为一个选择器只查询一次
+CF_CHALLENGE_SELECTOR = (
+    '#challenge-form, .challenge-form, #challenge-running, #cf-content, #challenge-stage, '
+    ':text("Checking your browser")'
+)
+RENEW_BUTTON_SELECTOR = (
+    'button:has-text("시간추가"), button:has-text("시간 추가"), '
+    'button:has-text("Renew"), button:has-text("Add Time")'
+)
+# 全部使用完全匹配，避免匹配到 "Restart" / "Restart Server" / "재시작"
+START_BUTTON_SELECTOR = 'button:text-is("Start"), button:text-is("Start Server"), button:text-is("시작")'
+
+# 续期结果提示
+RENEW_ERROR_PATTERN = re.compile(
+    r"already renewed|can't renew|only once|이미|한번|불가능|already added|status code 400|failed|error|오류",
+    re.IGNORECASE
+)
+RENEW_SUCCESS_PATTERN = re.compile(r"success|성공|added|추가됨|시간이 추가|추가되었습니다", re.IGNORECASE)
+
+# CF挑战页面文本
+CF_TEXT_PATTERN = re.compile(r"checking your browser|verify|security check|cloudflare", re.IGNORECASE)
+
+# 启动成功提示
+START_SUCCESS_PATTERN = re.compile(r"started|running|启动|시작", re.IGNORECASE)
+
+# 视为续期/启动成功的状态，用于统计
+RENEW_OK_STATUSES = frozenset({'renew_success', 'already_renewed'})
+START_OK_STATUSES = frozenset({'start_success', 'already_started'})
+
+# 续期接口需要保存的请求头（XSRF令牌每次从Cookie重新读取）
+RENEW_API_HEADERS = ('accept', 'content-type', 'x-requested-with')
+
+# 续期接口路径（同时还要包含服务器ID），避免把其他POST请求当成续期接口
+RENEW_API_PATH_PATTERN = re.compile(r'/renew', re.IGNORECASE)
+
+# 状态消息映射（只读）
+STATUS_MESSAGES = MappingProxyType({
+    # 续期状态
+    "renew_success": "✅ 续期成功",
+    "already_renewed": "🔄 已经续期过",
+    "no_renew_button": "❌ 未找到续期按钮",
+    "renew_button_disabled": "❌ 续期按钮不可用(可能被CF屏蔽)",
+    "renew_unknown_changed": "⚠️ 续期页面变化但结果未知",
+    "renew_no_change": "⚠️ 续期页面无变化",
+    "renew_click_error": "💥 点击续期按钮出错",
+    "renew_error": "💥 续期过程出错",
+
+    # 启动状态
+    "start_success": "✅ 启动成功",
+    "already_started": "🔄 已经启动",
+    "no_start_button": "❌ 未找到Start按钮",
+    "start_unknown": "⚠️ 启动完成但状态未知",
+    "start_error": "💥 启动过程出错",
+
+    # 通用状态
+    "login_failed": "❌ 登录失败",
+    "error": "💥 运行出错",
+    "未执行": "⏸️ 未执行",
+
+    # 错误状态
+    "error: no_auth": "❌ 无认证信息",
+    "error: no_servers": "❌ 无服务器配置",
+    "error: timeout": "⏰ 操作超时",
+    "error: runtime": "💥 运行时错误"
+})
 
 
 class WeirdhostAuto:
@@ -25,22 +104,38 @@ class WeirdhostAuto:
         self.email = os.getenv('WEIRDHOST_EMAIL', '')
         self.password = os.getenv('WEIRDHOST_PASSWORD', '')
         
+        # 浏览器状态文件（Cookie、localStorage），用于复用上次运行的登录状态
+        self.storage_state_file = os.getenv('STORAGE_STATE_FILE', 'state.json')
+        
+        # 续期接口文件，浏览器续期时自动捕获，之后直接调用接口续期
+        self.renew_api_file = os.getenv('RENEW_API_FILE', 'renew.json')
+        self.renew_api = None
+        
         # 浏览器配置
         self.headless = os.getenv('HEADLESS', 'true').lower() == 'true'
         self.slow_mo = int(os.getenv('SLOW_MO', '100'))  # 添加延迟模拟人类操作
+        self.max_concurrency = max(1, int(os.getenv('MAX_CONCURRENCY', '4')))  # 同时处理的服务器数量
         
-        # 解析服务器URL列表
-        self.server_list = []
-        if self.server_urls:
-            self.server_list = [url.strip() for url in self.server_urls.split(',') if url.strip()]
+        # 解析服务器URL列表，支持逗号、空格或换行分隔
+        self.server_list = re.findall(r'https?://[^\s,]+', self.server_urls)
         
         # 存储每个服务器的结果
         self.server_results = {}
+        
+        # Playwright 和浏览器实例，任务结束后统一关闭
+        self.playwright = None
+        self.browser = None
+        
+        # 登录状态，并发处理服务器时共享
+        self.login_lock = asyncio.Lock()
+        self.login_version = 0  # 每次重新登录后加一
+        self.pending_logins = []  # 登录失效时依次尝试的登录方式
+        self.logged_in = False
+        self.login_unsaved = False  # 重新登录后，确认登录有效前暂不保存浏览器状态
     
     def log(self, message, level="INFO"):
         """日志输出"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"[{timestamp}] {level}: {message}")
+        sys.stdout.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {level}: {message}\n")
     
     def has_cookie_auth(self):
         """检查是否有 cookie 认证信息"""
@@ -50,13 +145,141 @@ class WeirdhostAuto:
         """检查是否有邮箱密码认证信息"""
         return bool(self.email and self.password)
     
+    def has_storage_state(self):
+        """检查是否有上次保存的浏览器状态"""
+        return os.path.isfile(self.storage_state_file)
+    
+    async def save_storage_state(self, context):
+        """保存浏览器状态，供下次运行直接复用"""
+        try:
+            await context.storage_state(path=self.storage_state_file)
+            self.log(f"💾 已保存浏览器状态: {self.storage_state_file}")
+        except Exception as e:
+            self.log(f"保存浏览器状态失败: {e}", "WARNING")
+    
+    async def block_resources(self, route):
+        """拦截图片、字体、媒体和第三方追踪请求（只有匹配 BLOCKED_URL_PATTERN 的请求会进入这里）"""
+        await route.abort()
+    
+    def load_renew_api(self):
+        """读取上次捕获的续期接口，不是续期接口的记录直接丢弃"""
+        try:
+            with open(self.renew_api_file, 'r', encoding='utf-8') as f:
+                renew_api = json.load(f)
+            if not self.is_renew_endpoint(renew_api['url'], '{server_id}'):
+                self.log(f"⚠️ 已保存的续期接口不是续期地址，重新从浏览器捕获: {renew_api['url']}", "WARNING")
+                os.remove(self.renew_api_file)
+                return None
+            return renew_api
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.log(f"读取续期接口文件失败: {e}", "WARNING")
+            return None
+    
+    def get_server_id(self, server_url):
+        """从服务器URL中取出服务器ID，忽略末尾的斜杠"""
+        return server_url.rstrip('/').split('/')[-1] if server_url else ""
+    
+    def is_renew_endpoint(self, url, server_id):
+        """判断URL是否为该服务器的续期接口：路径中同时包含服务器ID和renew"""
+        path = urlparse(url).path
+        return bool(server_id) and server_id in path and RENEW_API_PATH_PATTERN.search(path) is not None
+    
+    def is_api_response(self, response):
+        """续期接口应返回JSON或空响应，其他内容类型（如HTML页面）无法按状态码判断结果"""
+        return response.status == 204 or 'json' in response.headers.get('content-type', '')
+    
+    def save_renew_api(self, request, server_id):
+        """保存点击续期按钮时发出的接口请求，服务器ID替换为占位符"""
+        # 不是该服务器的续期接口时无法生成模板，不保存
+        if request.method != "POST" or not self.is_renew_endpoint(request.url, server_id):
+            self.log(f"⚠️ 服务器 {server_id} 请求不是续期接口，不保存: {request.method} {request.url}", "WARNING")
+            return
+        
+        try:
+            renew_api = {
+                'method': request.method,
+                'url': request.url.replace(server_id, '{server_id}'),
+                'headers': {name: value for name, value in request.headers.items() if name.lower() in RENEW_API_HEADERS},
+                'data': request.post_data
+            }
+            if renew_api != self.renew_api:
+                with open(self.renew_api_file, 'w', encoding='utf-8') as f:
+                    json.dump(renew_api, f, ensure_ascii=False, indent=2)
+                self.renew_api = renew_api
+                self.log(f"💾 已保存续期接口: {renew_api['method']} {renew_api['url']}")
+        except Exception as e:
+            self.log(f"保存续期接口失败: {e}", "WARNING")
+    
+    def get_renew_status(self, status_code):
+        """根据续期接口的HTTP状态码判断结果，400表示本时段已续期，无法判断时返回None"""
+        if 200 <= status_code < 300:
+            return "renew_success"
+        elif status_code == 400:
+            return "already_renewed"
+        return None
+    
+    async def renew_via_api(self, context, server_id):
+        """直接调用续期接口续期，复用浏览器上下文的Cookie，失败时返回None交由浏览器处理"""
+        try:
+            url = self.renew_api['url'].replace('{server_id}', server_id)
+            self.log(f"📡 服务器 {server_id} 调用续期接口: {self.renew_api['method']} {url}")
+            
+            headers = dict(self.renew_api.get('headers') or {})
+            for cookie in await context.cookies(url):
+                if cookie['name'] == 'XSRF-TOKEN':
+                    headers['X-XSRF-TOKEN'] = unquote(cookie['value'])
+            
+            response = await context.request.fetch(
+                url,
+                method=self.renew_api['method'],
+                headers=headers,
+                data=self.renew_api.get('data'),
+                max_redirects=0,
+                fail_on_status_code=False
+            )
+            
+            # 重定向、401/419或返回HTML页面说明Cookie已失效（被带到了登录页），不能按状态码判断结果
+            if 300 <= response.status < 400 or response.status in (401, 419) or 'text/html' in response.headers.get('content-type', ''):
+                self.log(f"⚠️ 服务器 {server_id} 续期接口返回 {response.status}，登录状态可能已失效，改用浏览器续期", "WARNING")
+                return None
+            
+            # 内容类型不符合预期时结果未知
+            if not self.is_api_response(response):
+                self.log(f"⚠️ 服务器 {server_id} 续期接口返回 {response.status}（{response.headers.get('content-type', '')}），结果未知，改用浏览器续期", "WARNING")
+                return None
+            
+            renew_status = self.get_renew_status(response.status)
+            if renew_status:
+                self.log(f"ℹ️ 服务器 {server_id} 续期接口返回 {response.status}: {renew_status}")
+            else:
+                self.log(f"⚠️ 服务器 {server_id} 接口返回 {response.status}，改用浏览器续期", "WARNING")
+            return renew_status
+                
+        except Exception as e:
+            self.log(f"⚠️ 服务器 {server_id} 调用续期接口出错: {e}，改用浏览器续期", "WARNING")
+            return None
+    
+    async def page_has_text(self, page, pattern):
+        """在浏览器内按正则查找可见文本，避免序列化整个页面HTML"""
+        try:
+            return await page.get_by_text(pattern).locator('visible=true').count() > 0
+        except Exception:
+            return False
+    
+    def is_login_url(self, url):
+        """根据URL路径判断是否在登录页面，查询参数（如登录后的跳转地址）不参与判断"""
+        path = urlparse(url).path
+        return path.startswith('/auth') or 'login' in path
+    
     def check_login_status(self, page):
         """检查是否已登录"""
         try:
             self.log("检查登录状态...")
             
-            # 简单检查：如果URL包含login或auth，说明未登录
-            if "login" in page.url or "auth" in page.url:
+            # 只根据URL判断，不读取页面内容
+            if self.is_login_url(page.url):
                 self.log("当前在登录页面，未登录")
                 return False
             else:
@@ -67,7 +290,7 @@ class WeirdhostAuto:
             self.log(f"检查登录状态时出错: {e}", "ERROR")
             return False
     
-    def login_with_cookies(self, context):
+    async def login_with_cookies(self, context):
         """使用 Cookies 登录"""
         try:
             self.log("尝试使用 Cookies 登录...")
@@ -84,7 +307,7 @@ class WeirdhostAuto:
                 'sameSite': 'Lax'
             }
             
-            context.add_cookies([session_cookie])
+            await context.add_cookies([session_cookie])
             self.log("已添加 remember_web cookie")
             return True
                 
@@ -92,40 +315,36 @@ class WeirdhostAuto:
             self.log(f"设置 Cookies 时出错: {e}", "ERROR")
             return False
     
-    def login_with_email(self, page):
+    async def login_with_email(self, page):
         """使用邮箱密码登录"""
         try:
             self.log("尝试使用邮箱密码登录...")
             
             # 访问登录页面
             self.log(f"访问登录页面: {self.login_url}")
-            page.goto(self.login_url, wait_until="domcontentloaded")
+            await page.goto(self.login_url, wait_until="domcontentloaded")
             
             # 使用固定选择器
-            email_selector = 'input[name="username"]'
-            password_selector = 'input[name="password"]'
-            login_button_selector = 'button[type="submit"]'
+            email_field = page.locator('input[name="username"]')
+            password_field = page.locator('input[name="password"]')
+            login_button = page.locator('button[type="submit"]')
             
-            # 等待元素加载
+            # 只等待表单出现一次，其余字段由fill/click自动等待
             self.log("等待登录表单元素加载...")
-            page.wait_for_selector(email_selector)
-            page.wait_for_selector(password_selector)
-            page.wait_for_selector(login_button_selector)
+            await email_field.wait_for(state="visible")
             
-            # 填写登录信息
+            # 填写登录信息（fill会一次性写入并触发input事件，无需额外等待）
             self.log("填写邮箱和密码...")
-            page.fill(email_selector, self.email)
-            time.sleep(1)  # 模拟人类输入
-            page.fill(password_selector, self.password)
-            time.sleep(1)
+            await email_field.fill(self.email)
+            await password_field.fill(self.password)
             
             # 点击登录并等待导航
             self.log("点击登录按钮...")
-            with page.expect_navigation(wait_until="domcontentloaded", timeout=90000):
-                page.click(login_button_selector)
+            async with page.expect_navigation(wait_until="domcontentloaded", timeout=90000):
+                await login_button.click()
             
             # 检查登录是否成功
-            if "login" in page.url or "auth" in page.url:
+            if self.is_login_url(page.url):
                 self.log("邮箱密码登录失败，仍在登录页面", "ERROR")
                 return False
             else:
@@ -136,50 +355,59 @@ class WeirdhostAuto:
             self.log(f"邮箱密码登录时出错: {e}", "ERROR")
             return False
     
-    def handle_cf_challenge(self, page, server_id):
+    async def relogin(self, page, login_version):
+        """登录失效时依次尝试剩余的登录方式，多个页面同时失效时只重新登录一次"""
+        async with self.login_lock:
+            # 其他页面已经重新登录过，直接重试即可
+            if self.login_version != login_version:
+                return True
+            
+            while self.pending_logins:
+                method = self.pending_logins.pop(0)
+                if method == 'cookie':
+                    success = await self.login_with_cookies(page.context)
+                else:
+                    success = await self.login_with_email(page)
+                
+                if success:
+                    self.login_version += 1
+                    self.login_unsaved = True
+                    return True
+            
+            return False
+    
+    async def handle_cf_challenge(self, page, server_id):
         """处理CF五秒盾挑战"""
         try:
             self.log(f"检查服务器 {server_id} 是否遇到CF挑战...")
             
+            # 同时查询CF挑战元素和CF相关文本
+            challenge = page.locator(CF_CHALLENGE_SELECTOR).locator('visible=true').first
+            challenge_visible, has_cf_text = await asyncio.gather(
+                challenge.is_visible(), self.page_has_text(page, CF_TEXT_PATTERN)
+            )
+            
             # 检查是否有CF挑战页面
-            cf_selectors = [
-                '#challenge-form',
-                '.challenge-form',
-                '#challenge-running',
-                '#cf-content',
-                '#challenge-stage',
-                'text=Checking your browser'
-            ]
-            
-            for selector in cf_selectors:
+            if challenge_visible:
+                self.log(f"⚠️ 服务器 {server_id} 检测到CF挑战，正在等待...")
+                
+                # 等待CF挑战元素消失（通常5-10秒），最多等待15秒
                 try:
-                    if page.locator(selector).is_visible(timeout=3000):
-                        self.log(f"⚠️ 服务器 {server_id} 检测到CF挑战，正在等待...")
-                        
-                        # 等待CF挑战完成（通常5-10秒）
-                        wait_time = 10
-                        self.log(f"等待 {wait_time} 秒让CF挑战完成...")
-                        time.sleep(wait_time)
-                        
-                        # 检查挑战是否完成
-                        if page.locator(selector).is_visible(timeout=3000):
-                            self.log(f"⚠️ 服务器 {server_id} CF挑战仍然存在，继续等待...")
-                            time.sleep(5)
-                        
-                        self.log(f"✅ 服务器 {server_id} CF挑战处理完成")
-                        return True
-                except:
-                    continue
+                    await challenge.wait_for(state="hidden", timeout=15000)
+                except TimeoutError:
+                    self.log(f"⚠️ 服务器 {server_id} CF挑战仍然存在，继续执行...")
+                
+                self.log(f"✅ 服务器 {server_id} CF挑战处理完成")
+                return True
             
             # 检查是否有"Verify you are human"等文本
-            cf_texts = ["Checking your browser", "Verify", "Security Check", "Cloudflare"]
-            page_text = page.content().lower()
-            
-            for text in cf_texts:
-                if text.lower() in page_text:
-                    self.log(f"⚠️ 服务器 {server_id} 检测到CF相关文本，等待挑战...")
-                    time.sleep(10)
-                    return True
+            if has_cf_text:
+                self.log(f"⚠️ 服务器 {server_id} 检测到CF相关文本，等待挑战...")
+                try:
+                    await page.get_by_text(CF_TEXT_PATTERN).locator('visible=true').first.wait_for(state="hidden", timeout=10000)
+                except TimeoutError:
+                    self.log(f"⚠️ 服务器 {server_id} CF相关文本仍然存在，继续执行...")
+                return True
             
             return False
             
@@ -187,231 +415,179 @@ class WeirdhostAuto:
             self.log(f"检查CF挑战时出错: {e}", "WARNING")
             return False
     
-    def wait_for_page_ready(self, page, server_id, operation="操作"):
+    async def wait_for_page_ready(self, page, server_id, operation="操作"):
         """等待页面完全就绪，增加CF挑战处理"""
         self.log(f"等待服务器 {server_id} {operation}页面加载...")
         
         # 首先处理可能的CF挑战
-        self.handle_cf_challenge(page, server_id)
+        await self.handle_cf_challenge(page, server_id)
         
         # 等待主要内容区域加载
         try:
-            page.wait_for_selector('.server-details, .server-info, .card, .panel, .container, main, article', timeout=15000)
+            await page.wait_for_selector('.server-details, .server-info, .card, .panel, .container, main, article', timeout=15000)
             self.log(f"✅ 服务器 {server_id} 主要内容已加载")
         except:
             self.log(f"⚠️ 服务器 {server_id} 未找到主要内容区域")
         
-        # 等待所有图片加载完成
-        try:
-            page.wait_for_load_state('networkidle', timeout=20000)
-            self.log(f"✅ 服务器 {server_id} 网络空闲")
-        except:
-            self.log(f"⚠️ 服务器 {server_id} 网络未完全空闲")
-        
-        # 额外等待时间确保动态内容加载，特别是CF挑战后
-        time.sleep(3)
-        
         # 再次检查CF挑战
-        self.handle_cf_challenge(page, server_id)
-    
-    def find_renew_button(self, page, server_id):
-        """查找续期按钮 - 使用多种方法"""
-        selectors = [
-            'button:has-text("시간추가")',
-            'button:has-text("시간 추가")',
-            '//button[contains(text(), "시간추가")]',
-            '//button[contains(text(), "시간 추가")]',
-            'button:has-text("Renew")',
-            'button:has-text("Add Time")',
-        ]
-        
-        # 先等待页面稳定
-        time.sleep(2)
-        
-        for selector in selectors:
-            try:
-                if selector.startswith('//'):
-                    button = page.locator(f'xpath={selector}')
-                else:
-                    button = page.locator(selector)
-                
-                # 使用更严格的可见性检查
-                button.wait_for(state='visible', timeout=8000)
-                
-                if button.is_visible():
-                    self.log(f"✅ 服务器 {server_id} 找到续期按钮: {selector}")
-                    return button
-                    
-            except Exception as e:
-                continue
+        await self.handle_cf_challenge(page, server_id)
+    
+    async def find_button(self, page, server_id, selector, label, keywords, exact_match=False):
+        """查找按钮 - 先用合并后的选择器，找不到时再用备用方法"""
+        try:
+            # 所有候选选择器合并为一次查询，只等待一次
+            button = page.locator(selector).locator('visible=true').first
+            await button.wait_for(state='visible', timeout=8000)
+            self.log(f"✅ 服务器 {server_id} 找到{label}: {(await button.text_content()).strip()}")
+            return button
+        except Exception as e:
+            pass
         
         # 如果上述方法都失败，尝试更广泛的搜索
-        return self.find_button_alternative_methods(page, server_id, ["시간", "Renew", "Add", "추가"])
+        return await self.find_button_alternative_methods(page, server_id, keywords, exact_match)
+    
+    async def find_renew_button(self, page, server_id):
+        """查找续期按钮"""
+        return await self.find_button(page, server_id, RENEW_BUTTON_SELECTOR, "续期按钮", ["시간", "Renew", "Add", "추가"])
     
-    def find_start_button(self, page, server_id):
+    async def find_start_button(self, page, server_id):
         """查找启动按钮 - 完全匹配 Start"""
-        selectors = [
-            'button:has-text("Start")',
-            '//button[text()="Start"]',
-            'button:has-text("Start Server")',
-            'button:has-text("시작")',
-            '//button[contains(text(), "Start")]',
-        ]
-        
-        for selector in selectors:
-            try:
-                if selector.startswith('//'):
-                    button = page.locator(f'xpath={selector}')
-                else:
-                    button = page.locator(selector)
-                
-                # 使用更严格的可见性检查
-                button.wait_for(state='visible', timeout=8000)
-                
-                if button.is_visible():
-                    self.log(f"✅ 服务器 {server_id} 找到启动按钮: {selector}")
-                    return button
-                    
-            except Exception as e:
-                continue
-        
-        # 如果上述方法都失败，尝试更广泛的搜索
-        return self.find_button_alternative_methods(page, server_id, ["Start", "시작"], exact_match=True)
+        return await self.find_button(page, server_id, START_BUTTON_SELECTOR, "启动按钮", ["Start", "시작"], exact_match=True)
     
-    def find_button_alternative_methods(self, page, server_id, keywords, exact_match=False):
+    async def find_button_alternative_methods(self, page, server_id, keywords, exact_match=False):
         """备用的按钮查找方法"""
-        # 方法1: 查找所有按钮并筛选
-        try:
-            all_buttons = page.locator('button')
-            button_count = all_buttons.count()
-            
-            for i in range(button_count):
-                try:
-                    button = all_buttons.nth(i)
-                    if button.is_visible():
-                        text = button.text_content().strip()
-                        
-                        if exact_match:
-                            # 完全匹配
-                            if any(keyword == text for keyword in keywords):
-                                self.log(f"✅ 服务器 {server_id} 通过文本搜索找到按钮: '{text}'")
-                                return button
-                        else:
-                            # 包含匹配
-                            if any(keyword in text for keyword in keywords):
-                                self.log(f"✅ 服务器 {server_id} 通过文本搜索找到按钮: '{text}'")
-                                return button
-                except:
-                    continue
-        except:
-            pass
+        def matches(text):
+            # 完全匹配或包含匹配
+            if exact_match:
+                return text in keywords
+            return any(keyword in text for keyword in keywords)
         
-        # 方法2: 查找特定class的按钮
+        # 所有可见按钮（包括按钮样式的元素）的文本一次取回，在Python中筛选
+        # 使用 text_content 而非 inner_text，不受CSS大小写转换影响
         try:
-            primary_buttons = page.locator('button.btn-primary, button.btn-success, button.btn-info, button.is-primary, .btn, .button')
-            if primary_buttons.count() > 0:
-                for i in range(primary_buttons.count()):
-                    button = primary_buttons.nth(i)
-                    if button.is_visible():
-                        text = button.text_content().strip()
-                        
-                        if exact_match:
-                            if any(keyword == text for keyword in keywords):
-                                self.log(f"✅ 服务器 {server_id} 通过class找到按钮")
-                                return button
-                        else:
-                            if any(keyword in text for keyword in keywords):
-                                self.log(f"✅ 服务器 {server_id} 通过class找到按钮")
-                                return button
+            buttons = page.locator('button, .btn, .button').locator('visible=true')
+            texts = await buttons.all_text_contents()
+            
+            for i, text in enumerate(texts):
+                text = text.strip()
+                if matches(text):
+                    self.log(f"✅ 服务器 {server_id} 通过文本搜索找到按钮: '{text}'")
+                    return buttons.nth(i)
         except:
             pass
         
         self.log(f"❌ 服务器 {server_id} 所有方法都未找到按钮")
         return None
     
-    def renew_server(self, page, server_url):
-        """续期服务器，增加CF挑战处理"""
+    async def renew_server(self, page, server_id):
+        """续期服务器（页面已位于该服务器页面），增加CF挑战处理"""
         try:
-            server_id = server_url.split('/')[-1]
             self.log(f"📅 开始续期服务器 {server_id}")
             
-            # 访问服务器页面
-            self.log(f"访问服务器页面: {server_url}")
-            page.goto(server_url, wait_until="networkidle")
-            
             # 等待页面加载，包含CF挑战处理
-            self.wait_for_page_ready(page, server_id, "续期")
+            await self.wait_for_page_ready(page, server_id, "续期")
             
             # 查找续期按钮
-            button = self.find_renew_button(page, server_id)
+            button = await self.find_renew_button(page, server_id)
             
             if not button:
                 self.log(f"❌ 服务器 {server_id} 未找到续期按钮")
                 return "no_renew_button"
             
             # 检查按钮是否被CF屏蔽
-            if not button.is_enabled():
+            if not await button.is_enabled():
                 self.log(f"⚠️ 服务器 {server_id} 续期按钮不可点击，可能被CF屏蔽，等待后重试...")
-                time.sleep(5)
-                
-                # 刷新页面重试
-                page.reload(wait_until="networkidle")
-                self.wait_for_page_ready(page, server_id, "续期重试")
-                
-                button = self.find_renew_button(page, server_id)
-                if not button or not button.is_enabled():
-                    self.log(f"❌ 服务器 {server_id} 续期按钮仍然不可点击")
-                    return "renew_button_disabled"
+                try:
+                    # 先等待按钮自行恢复可用，仍不可用时再刷新页面
+                    await expect(button).to_be_enabled(timeout=5000)
+                except AssertionError:
+                    # 刷新页面重试，按钮由后续查找等待出现
+                    await page.reload(wait_until="domcontentloaded")
+                    await self.wait_for_page_ready(page, server_id, "续期重试")
+                    
+                    button = await self.find_renew_button(page, server_id)
+                    if not button or not await button.is_enabled():
+                        self.log(f"❌ 服务器 {server_id} 续期按钮仍然不可点击")
+                        return "renew_button_disabled"
             
             # 点击按钮并检查结果
-            return self.click_renew_button_and_check(page, button, server_id)
+            return await self.click_renew_button_and_check(page, button, server_id)
                 
         except Exception as e:
             self.log(f"❌ 服务器 {server_id} 续期过程中出错: {e}")
             return "renew_error"
     
-    def click_renew_button_and_check(self, page, button, server_id):
+    async def click_renew_button_and_check(self, page, button, server_id):
         """点击续期按钮并检查结果"""
         try:
-            if button.is_enabled():
-                # 点击前保存页面状态用于比较
-                before_click = page.content()
+            if await button.is_enabled():
+                # 续期结果提示，只在页面可见文本中匹配，不序列化整个DOM
+                error_locator = page.get_by_text(RENEW_ERROR_PATTERN).locator('visible=true').first
+                success_locator = page.get_by_text(RENEW_SUCCESS_PATTERN).locator('visible=true').first
+                
+                # 点击前保存页面文本用于比较
+                before_click = await page.locator('body').inner_text()
                 
                 self.log(f"✅ 服务器 {server_id} 续期按钮可点击，正在点击...")
                 
                 # 模拟人类操作：鼠标移动到按钮上
-                button.hover()
-                time.sleep(1)
+                await button.hover()
+                await asyncio.sleep(1)
+                
+                # 点击按钮，并等待续期接口的响应（点击后发往该服务器续期地址的POST请求）
+                # 等待超时在退出 async with 时抛出，因此整个代码块都放在 try 中
+                clicked = False
+                try:
+                    async with page.expect_response(
+                        lambda response: response.request.method == "POST" and self.is_renew_endpoint(response.url, server_id),
+                        timeout=8000
+                    ) as response_info:
+                        await button.click()
+                        clicked = True
+                    renew_response = await response_info.value
+                except TimeoutError:
+                    # 点击本身超时仍按点击出错处理
+                    if not clicked:
+                        raise
+                    renew_response = None
+                    self.log(f"⚠️ 服务器 {server_id} 未捕获到续期接口响应")
                 
-                # 点击按钮
-                button.click()
+                # 根据续期接口的状态码直接判断结果，内容类型不符合预期时按页面提示判断
+                if renew_response and self.is_api_response(renew_response):
+                    renew_status = self.get_renew_status(renew_response.status)
+                    if renew_status:
+                        self.log(f"ℹ️ 服务器 {server_id} 续期接口返回 {renew_response.status}: {renew_status}")
+                        # 页面出现续期结果提示、确认结果后才保存续期接口，避免以后一直重放错误的请求
+                        try:
+                            await error_locator.or_(success_locator).first.wait_for(state='visible', timeout=3000)
+                            self.save_renew_api(renew_response.request, server_id)
+                        except TimeoutError:
+                            self.log(f"⚠️ 服务器 {server_id} 页面未出现续期结果提示，不保存续期接口")
+                        return renew_status
+                    self.log(f"⚠️ 服务器 {server_id} 续期接口返回 {renew_response.status}，根据页面提示判断")
                 
-                # 等待页面响应，增加等待时间处理可能的CF验证
-                time.sleep(8)
+                # 无法通过接口判断时，等待页面结果提示出现
+                try:
+                    await error_locator.or_(success_locator).first.wait_for(state='visible', timeout=3000)
+                except TimeoutError:
+                    self.log(f"⚠️ 服务器 {server_id} 未等到续期结果提示")
                 
                 # 检查是否出现CF挑战
-                self.handle_cf_challenge(page, server_id)
+                await self.handle_cf_challenge(page, server_id)
                 
-                # 检查页面变化
-                after_click = page.content()
+                # 同时查询错误消息、成功消息和当前页面文本
+                has_error, has_success, after_click = await asyncio.gather(
+                    error_locator.is_visible(),
+                    success_locator.is_visible(),
+                    page.locator('body').inner_text()
+                )
                 
                 # 检查是否出现错误消息
-                error_patterns = [
-                    "already renewed", "can't renew", "only once", 
-                    "이미", "한번", "불가능", "already added",
-                    "failed", "error", "오류"
-                ]
-                
-                has_error = any(pattern.lower() in after_click.lower() for pattern in error_patterns)
-                
                 if has_error:
                     self.log(f"ℹ️ 服务器 {server_id} 检测到重复续期提示")
                     return "already_renewed"
                 else:
                     # 检查是否有成功消息
-                    success_patterns = ["success", "성공", "added", "추가됨", "시간이 추가", "추가되었습니다"]
-                    has_success = any(pattern.lower() in after_click.lower() for pattern in success_patterns)
-                    
                     if has_success:
                         self.log(f"✅ 服务器 {server_id} 续期成功")
                         return "renew_success"
@@ -431,62 +607,62 @@ class WeirdhostAuto:
             self.log(f"❌ 服务器 {server_id} 点击续期按钮时出错: {e}")
             return "renew_click_error"
     
-    def start_server(self, page, server_url):
+    async def start_server(self, page, server_url):
         """启动服务器"""
         try:
-            server_id = server_url.split('/')[-1]
+            server_id = self.get_server_id(server_url)
             self.log(f"🚀 开始启动服务器 {server_id}")
             
-            # 刷新页面确保最新状态
-            page.reload(wait_until="networkidle")
+            # 刷新页面确保最新状态，不等待网络空闲（面板的websocket会一直占用连接）
+            await page.reload(wait_until="domcontentloaded")
             
             # 等待页面加载，包含CF挑战处理
-            self.wait_for_page_ready(page, server_id, "启动")
+            await self.wait_for_page_ready(page, server_id, "启动")
             
             # 查找启动按钮
-            button = self.find_start_button(page, server_id)
+            button = await self.find_start_button(page, server_id)
             
             if not button:
                 self.log(f"❌ 服务器 {server_id} 未找到Start按钮")
                 return "no_start_button"
             
             # 检查按钮是否被CF屏蔽
-            if not button.is_enabled():
+            if not await button.is_enabled():
                 self.log(f"⚠️ 服务器 {server_id} Start按钮不可点击，可能被CF屏蔽，等待后重试...")
-                time.sleep(5)
-                
-                # 再次查找按钮
-                button = self.find_start_button(page, server_id)
-                if not button or not button.is_enabled():
+                try:
+                    await expect(button).to_be_enabled(timeout=5000)
+                except AssertionError:
                     self.log(f"ℹ️ 服务器 {server_id} 已启动，按钮不可点击")
                     return "already_started"
             
             # 检查按钮状态并处理
-            if button.is_enabled():
+            if await button.is_enabled():
                 self.log(f"✅ 服务器 {server_id} 可以启动，正在点击...")
                 
                 # 模拟人类操作
-                button.hover()
-                time.sleep(1)
-                button.click()
+                await button.hover()
+                await asyncio.sleep(1)
+                await button.click()
                 
-                # 等待操作完成
-                time.sleep(8)
+                # 等待按钮变为不可用（启动请求已被面板接受），最多等待8秒
+                try:
+                    await expect(button).to_be_disabled(timeout=8000)
+                except AssertionError:
+                    pass
                 
                 # 检查是否出现CF挑战
-                self.handle_cf_challenge(page, server_id)
+                await self.handle_cf_challenge(page, server_id)
                 
                 # 检查是否启动成功
                 # 重新查找按钮，检查是否变为不可用或其他状态
                 try:
-                    new_button = self.find_start_button(page, server_id)
-                    if new_button and not new_button.is_enabled():
+                    new_button = await self.find_start_button(page, server_id)
+                    if new_button and not await new_button.is_enabled():
                         self.log(f"✅ 服务器 {server_id} 启动成功，按钮状态已变化")
                         return "start_success"
                     else:
                         # 检查是否有成功消息
-                        page_content = page.content().lower()
-                        if "started" in page_content or "running" in page_content or "启动" in page_content or "시작" in page_content:
+                        if await self.page_has_text(page, START_SUCCESS_PATTERN):
                             self.log(f"✅ 服务器 {server_id} 启动成功")
                             return "start_success"
                         else:
@@ -503,9 +679,9 @@ class WeirdhostAuto:
             self.log(f"❌ 服务器 {server_id} 启动过程中出错: {e}")
             return "start_error"
     
-    def process_server(self, page, server_url):
+    async def process_server(self, page, server_url):
         """处理单个服务器的续期和启动操作"""
-        server_id = server_url.split('/')[-1] if server_url else "unknown"
+        server_id = self.get_server_id(server_url) or "unknown"
         self.log(f"🔧 开始处理服务器 {server_id}")
         
         # 初始化服务器结果
@@ -515,31 +691,50 @@ class WeirdhostAuto:
         }
         
         try:
-            # 访问服务器页面
+            login_version = self.login_version
+            
+            # 访问服务器页面，不等待网络空闲，文档解析完成后即可检查CF挑战和登录状态
             self.log(f"访问服务器页面: {server_url}")
-            page.goto(server_url, wait_until="networkidle")
+            await page.goto(server_url, wait_until="commit")
             
-            # 首先处理可能的CF挑战
-            self.handle_cf_challenge(page, server_id)
+            # 首先处理可能的CF挑战（等文档解析完成后才能检测到挑战页面元素）
+            await page.wait_for_load_state("domcontentloaded")
+            await self.handle_cf_challenge(page, server_id)
             
-            # 检查是否已登录
-            if not self.check_login_status(page):
+            # 检查是否已登录，未登录时重新登录后再次访问
+            while not self.check_login_status(page):
                 self.log(f"服务器 {server_id} 未登录，尝试重新登录", "WARNING")
-                self.server_results[server_id]['renew_status'] = 'login_failed'
-                self.server_results[server_id]['start_status'] = 'login_failed'
-                return f"{server_id}: login_failed"
+                if not await self.relogin(page, login_version):
+                    self.log(f"❌ 服务器 {server_id} 所有登录方式都失败了", "ERROR")
+                    self.server_results[server_id]['renew_status'] = 'login_failed'
+                    self.server_results[server_id]['start_status'] = 'login_failed'
+                    return f"{server_id}: login_failed"
+                
+                login_version = self.login_version
+                self.log(f"重新访问服务器页面: {server_url}")
+                await page.goto(server_url, wait_until="commit")
+                await page.wait_for_load_state("domcontentloaded")
+                await self.handle_cf_challenge(page, server_id)
+            
+            self.logged_in = True
+            
+            # 重新登录后确认已能访问服务器页面再保存，后续运行中途出错也不必再次登录
+            if self.login_unsaved:
+                self.login_unsaved = False
+                await self.save_storage_state(page.context)
             
             # 第一步：执行续期操作
             self.log(f"第一步：执行续期操作")
-            renew_result = self.renew_server(page, server_url)
+            renew_result = None
+            if self.renew_api:
+                renew_result = await self.renew_via_api(page.context, server_id)
+            if not renew_result:
+                renew_result = await self.renew_server(page, server_id)
             self.server_results[server_id]['renew_status'] = renew_result
             
-            # 等待一下，确保续期操作完成
-            time.sleep(5)
-            
             # 第二步：执行启动操作
             self.log(f"第二步：执行启动操作")
-            start_result = self.start_server(page, server_url)
+            start_result = await self.start_server(page, server_url)
             self.server_results[server_id]['start_status'] = start_result
             
             # 返回组合结果
@@ -554,16 +749,34 @@ class WeirdhostAuto:
             self.server_results[server_id]['start_status'] = 'error'
             return f"{server_id}: error"
     
-    def run(self):
+    async def process_server_with_pool(self, page_pool, server_url):
+        """从页面池取出一个页面处理服务器，处理完成后归还"""
+        page = await page_pool.get()
+        try:
+            # 同一页面相邻两次处理至少间隔8秒，处理本身已超过8秒时不再额外等待
+            deadline = time.monotonic() + 8
+            result = await self.process_server(page, server_url)
+            self.log(f"服务器处理结果: {result}")
+            
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            return result
+        finally:
+            page_pool.put_nowait(page)
+    
+    async def run(self):
         """主运行函数"""
         self.log("开始 Weirdhost 自动续期和启动任务")
         
         # 检查认证信息
         has_cookie = self.has_cookie_auth()
         has_email = self.has_email_auth()
+        has_state = self.has_storage_state()
         
         self.log(f"Cookie 认证可用: {has_cookie}")
         self.log(f"邮箱密码认证可用: {has_email}")
+        self.log(f"已保存的浏览器状态可用: {has_state}")
         
         if not has_cookie and not has_email:
             self.log("没有可用的认证信息！", "ERROR")
@@ -578,80 +791,94 @@ class WeirdhostAuto:
         for i, server_url in enumerate(self.server_list, 1):
             self.log(f"服务器 {i}: {server_url}")
         
-        results = []
+        # 读取续期接口，存在时优先直接调用接口续期
+        self.renew_api = self.load_renew_api()
+        self.log(f"续期接口可用: {bool(self.renew_api)}")
         
         try:
-            with sync_playwright() as p:
-                # 启动浏览器，增加一些参数绕过检测
-                browser = p.chromium.launch(
-                    headless=self.headless,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-features=IsolateOrigins,site-per-process',
-                        '--disable-web-security',
-                        '--disable-features=site-per-process'
-                    ]
-                )
-                
-                # 创建浏览器上下文
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-                
-                # 创建页面
-                page = context.new_page()
-                page.set_default_timeout(120000)  # 增加超时时间
-                page.set_default_navigation_timeout(120000)
-                
-                login_success = False
-                
-                # 方案1: 尝试 Cookie 登录
+            # 启动浏览器，增加一些参数绕过检测
+            self.playwright = await async_playwright().start()
+            browser = self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=[
+                    '--disable-blink-features=AutomationControlled',
+                    '--disable-features=IsolateOrigins,site-per-process',
+                    '--disable-web-security',
+                    '--disable-features=site-per-process',
+                    # 减少启动耗时和内存占用
+                    '--disable-dev-shm-usage',
+                    '--disable-gpu'
+                ]
+            )
+            
+            # 创建浏览器上下文，所有页面共享同一个上下文（共享登录 Cookie）
+            context_options = {
+                'viewport': {'width': 1920, 'height': 1080},
+                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            }
+            context = None
+            
+            # 如有上次保存的浏览器状态则直接加载，文件损坏时删除并改用 Cookie/邮箱登录
+            if has_state:
+                try:
+                    context = await browser.new_context(storage_state=self.storage_state_file, **context_options)
+                except Exception as e:
+                    self.log(f"加载浏览器状态失败，删除后重新登录: {e}", "WARNING")
+                    try:
+                        os.remove(self.storage_state_file)
+                    except OSError:
+                        pass
+                    has_state = False
+            if context is None:
+                context = await browser.new_context(**context_options)
+            context.set_default_timeout(120000)  # 增加超时时间
+            context.set_default_navigation_timeout(120000)
+            
+            # 拦截无关资源，加快页面加载
+            await context.route(BLOCKED_URL_PATTERN, self.block_resources)
+            
+            # 创建页面
+            page = await context.new_page()
+            
+            # 登录状态在第一次访问服务器页面时检查，失效时再依次尝试其他登录方式
+            if has_state:
+                self.log("使用已保存的浏览器状态")
                 if has_cookie:
-                    if self.login_with_cookies(context):
-                        # 访问任意页面检查登录状态
-                        self.log("检查Cookie登录状态...")
-                        page.goto(self.url, wait_until="domcontentloaded")
-                        
-                        # 处理可能的CF挑战
-                        self.handle_cf_challenge(page, "登录检查")
-                        
-                        if self.check_login_status(page):
-                            self.log("✅ Cookie 登录成功！")
-                            login_success = True
-                        else:
-                            self.log("Cookie 登录失败，cookies 可能已过期", "WARNING")
-                
-                # 方案2: 如果 Cookie 登录失败，尝试邮箱密码登录
-                if not login_success and has_email:
-                    if self.login_with_email(page):
-                        # 登录成功后访问首页
-                        self.log("检查邮箱密码登录状态...")
-                        page.goto(self.url, wait_until="domcontentloaded")
-                        
-                        # 处理可能的CF挑战
-                        self.handle_cf_challenge(page, "登录检查")
-                        
-                        if self.check_login_status(page):
-                            self.log("✅ 邮箱密码登录成功！")
-                            login_success = True
-                
-                # 如果登录成功，依次处理每个服务器
-                if login_success:
-                    for server_url in self.server_list:
-                        result = self.process_server(page, server_url)
-                        results.append(result)
-                        self.log(f"服务器处理结果: {result}")
-                        
-                        # 在处理下一个服务器前等待一下
-                        time.sleep(8)
-                else:
-                    self.log("❌ 所有登录方式都失败了", "ERROR")
-                    results = ["login_failed"] * len(self.server_list)
-                
-                browser.close()
-                return results
-                
+                    self.pending_logins.append('cookie')
+            elif has_cookie:
+                await self.login_with_cookies(context)
+            if has_email:
+                self.pending_logins.append('email')
+            
+            # 使用页面池并发处理每个服务器
+            pool_size = min(len(self.server_list), self.max_concurrency)
+            self.log(f"并发处理服务器，页面池大小: {pool_size}")
+            
+            page_pool = asyncio.Queue()
+            page_pool.put_nowait(page)
+            for _ in range(pool_size - 1):
+                page_pool.put_nowait(await context.new_page())
+            
+            # 单个服务器出现未处理的异常时只影响该服务器的结果
+            results = []
+            outcomes = await asyncio.gather(
+                *(self.process_server_with_pool(page_pool, server_url) for server_url in self.server_list),
+                return_exceptions=True
+            )
+            for server_url, outcome in zip(self.server_list, outcomes):
+                if isinstance(outcome, Exception):
+                    server_id = self.get_server_id(server_url) or "unknown"
+                    self.log(f"❌ 处理服务器 {server_id} 时出现未处理的错误: {outcome}", "ERROR")
+                    self.server_results[server_id] = {'renew_status': 'error', 'start_status': 'error'}
+                    outcome = f"{server_id}: error"
+                results.append(outcome)
+            
+            if self.logged_in:
+                await self.save_storage_state(context)
+            
+            # 浏览器在 run_and_report 中与写入README同时关闭
+            return results
+            
         except TimeoutError as e:
             self.log(f"操作超时: {e}", "ERROR")
             return ["error: timeout"] * len(self.server_list)
@@ -659,6 +886,22 @@ class WeirdhostAuto:
             self.log(f"运行时出错: {e}", "ERROR")
             return ["error: runtime"] * len(self.server_list)
     
+    async def close_browser(self):
+        """关闭浏览器并停止 Playwright"""
+        try:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            self.log(f"关闭浏览器时出错: {e}", "WARNING")
+    
+    async def run_and_report(self):
+        """执行任务并写入README，关闭浏览器与写入README同时进行"""
+        results = await self.run()
+        await asyncio.gather(self.close_browser(), asyncio.to_thread(self.write_readme_file, results))
+        return results
+    
     def write_readme_file(self, results):
         """写入README文件"""
         try:
@@ -666,39 +909,8 @@ class WeirdhostAuto:
             beijing_time = datetime.now(timezone(timedelta(hours=8)))
             timestamp = beijing_time.strftime('%Y-%m-%d %H:%M:%S')
             
-            # 状态消息映射
-            status_messages = {
-                # 续期状态
-                "renew_success": "✅ 续期成功",
-                "already_renewed": "🔄 已经续期过",
-                "no_renew_button": "❌ 未找到续期按钮",
-                "renew_button_disabled": "❌ 续期按钮不可用(可能被CF屏蔽)",
-                "renew_unknown_changed": "⚠️ 续期页面变化但结果未知",
-                "renew_no_change": "⚠️ 续期页面无变化",
-                "renew_click_error": "💥 点击续期按钮出错",
-                "renew_error": "💥 续期过程出错",
-                
-                # 启动状态
-                "start_success": "✅ 启动成功",
-                "already_started": "🔄 已经启动",
-                "no_start_button": "❌ 未找到Start按钮",
-                "start_unknown": "⚠️ 启动完成但状态未知",
-                "start_error": "💥 启动过程出错",
-                
-                # 通用状态
-                "login_failed": "❌ 登录失败",
-                "error": "💥 运行出错",
-                "未执行": "⏸️ 未执行",
-                
-                # 错误状态
-                "error: no_auth": "❌ 无认证信息",
-                "error: no_servers": "❌ 无服务器配置",
-                "error: timeout": "⏰ 操作超时",
-                "error: runtime": "💥 运行时错误"
-            }
-            
-            # 创建README内容
-            readme_content = f"""# Weirdhost 自动续期和启动脚本
+            # 创建README内容，各部分放入列表最后统一拼接
+            readme_parts = [f"""# Weirdhost 自动续期和启动脚本
 
 **最后运行时间**: `{timestamp}` (北京时间)
 
@@ -708,13 +920,13 @@ class WeirdhostAuto:
 
 | 服务器ID | 续期状态 | 启动状态 |
 |----------|----------|----------|
-"""
+"""]
             
             # 添加每个服务器的结果表格
             for server_id, status in self.server_results.items():
-                renew_msg = status_messages.get(status['renew_status'], f"❓ {status['renew_status']}")
-                start_msg = status_messages.get(status['start_status'], f"❓ {status['start_status']}")
-                readme_content += f"| `{server_id}` | {renew_msg} | {start_msg} |\n"
+                renew_msg = STATUS_MESSAGES.get(status['renew_status'], f"❓ {status['renew_status']}")
+                start_msg = STATUS_MESSAGES.get(status['start_status'], f"❓ {status['start_status']}")
+                readme_parts.append(f"| `{server_id}` | {renew_msg} | {start_msg} |\n")
             
             # 如果没有服务器结果，显示错误信息
             if not self.server_results:
@@ -723,20 +935,20 @@ class WeirdhostAuto:
                         parts = result.split(":", 1)
                         server_id = parts[0].strip()
                         status = parts[1].strip() if len(parts) > 1 else "unknown"
-                        status_msg = status_messages.get(status, f"❓ 未知状态 ({status})")
-                        readme_content += f"| `{server_id}` | {status_msg} | N/A |\n"
+                        status_msg = STATUS_MESSAGES.get(status, f"❓ 未知状态 ({status})")
+                        readme_parts.append(f"| `{server_id}` | {status_msg} | N/A |\n")
                     else:
-                        status_msg = status_messages.get(result, f"❓ 未知状态 ({result})")
-                        readme_content += f"| 未知 | {status_msg} | N/A |\n"
+                        status_msg = STATUS_MESSAGES.get(result, f"❓ 未知状态 ({result})")
+                        readme_parts.append(f"| 未知 | {status_msg} | N/A |\n")
             
             # 添加统计信息
             total_servers = len(self.server_list)
             successful_renews = sum(1 for s in self.server_results.values() 
-                                  if s['renew_status'] in ['renew_success', 'already_renewed'])
+                                  if s['renew_status'] in RENEW_OK_STATUSES)
             successful_starts = sum(1 for s in self.server_results.values() 
-                                  if s['start_status'] in ['start_success', 'already_started'])
+                                  if s['start_status'] in START_OK_STATUSES)
             
-            readme_content += f"""
+            readme_parts.append(f"""
 ## 统计信息
 
 - 总服务器数: {total_servers}
@@ -753,11 +965,14 @@ class WeirdhostAuto:
 
 > 注意：如果续期按钮显示"不可用(可能被CF屏蔽)"，通常等待一段时间后重试即可。
 > 脚本每天运行一次即可，多次运行不会有额外效果。
-"""
+""")
+            readme_content = "".join(readme_parts)
             
-            # 写入README文件
-            with open('README.md', 'w', encoding='utf-8') as f:
-                f.write(readme_content)
+            # 先写入临时文件再替换，避免进程中断时留下不完整的README
+            tmp_path = 'README.md.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(readme_content.encode('utf-8'))
+            os.replace(tmp_path, 'README.md')
             
             self.log("📝 README已更新")
             
@@ -798,11 +1013,8 @@ def main():
     print("⚠️  注意：此版本已针对CF五秒盾进行优化")
     print("=" * 50)
     
-    # 执行自动任务
-    results = auto.run()
-    
-    # 写入README文件
-    auto.write_readme_file(results)
+    # 执行自动任务并写入README文件
+    results = asyncio.run(auto.run_and_report())
     
     print("=" * 50)
     print("📊 运行结果汇总:")
@@ -816,9 +1028,9 @@ def main():
     # 统计结果
     total = len(auto.server_list)
     renew_success = sum(1 for s in auto.server_results.values() 
-                       if s['renew_status'] in ['renew_success', 'already_renewed'])
+                       if s['renew_status'] in RENEW_OK_STATUSES)
     start_success = sum(1 for s in auto.server_results.values() 
-                       if s['start_status'] in ['start_success', 'already_started'])
+                       if s['start_status'] in START_OK_STATUSES)
     
     print("\n" + "=" * 50)
     print(f"📈 统计信息:")